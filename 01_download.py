@@ -3,7 +3,7 @@ Download Summary of Deposits (SOD) data from FDIC sources.
 
 This script consolidates multiple download methods into a single interface:
 - 1987-1993: FDIC FOIA bulk download (ZIP files)
-- 1994-2025: FDIC Banks API (JSON to CSV)
+- 1994-2025: FDIC Banks API (JSON to parquet, or CSV with --format csv)
 
 Usage:
     # Download all available years
@@ -24,13 +24,30 @@ import sys
 import os
 import time
 import json
-import pandas as pd
+import csv
+import shutil
+import urllib3
 import yaml
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
+from itertools import takewhile
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Use libyaml's C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 # Default output directory (relative to repository root)
 DEFAULT_OUTPUT_DIR = 'data/raw'
 
@@ -38,13 +55,26 @@ DEFAULT_OUTPUT_DIR = 'data/raw'
 FDIC_API_BASE_URL = "https://api.fdic.gov/banks/sod"
 FDIC_API_MAX_LIMIT = 10000
 
+# Read size used when streaming bulk downloads to disk
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Per-year API download state, kept in the output directory so re-runs can
+# skip years known to have no records
+DOWNLOAD_STATE_FILE = '.download_state.json'
+EMPTY_YEAR_TTL = 30 * 24 * 60 * 60  # 30 days
+
 # FDIC schema configuration
 FDIC_SCHEMA_URL = "https://api.fdic.gov/banks/docs/sod_properties.yaml"
 SCHEMA_CACHE_FILE = Path(__file__).parent / "data" / ".sod_schema_cache.json"
 
 
-def create_session():
-    """Create requests session with retry logic."""
+def create_session(pool_maxsize=10):
+    """Create requests session with retry logic.
+
+    Args:
+        pool_maxsize: Connections kept alive per host; should be at least
+            the number of concurrent requests so none are discarded
+    """
     session = requests.Session()
 
     retry_strategy = Retry(
@@ -54,7 +84,9 @@ def create_session():
         allowed_methods=["HEAD", "GET", "OPTIONS"]
     )
 
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    # Pools for the FDIC hosts used (API, schema and bulk downloads)
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=4,
+                          pool_maxsize=pool_maxsize)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
 
@@ -66,6 +98,13 @@ def create_session():
     return session
 
 
+def parse_json(response):
+    """Decode a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
 def fetch_schema(session, force_refresh=False):
     """
     Fetch and cache FDIC field schema from YAML.
@@ -93,7 +132,8 @@ def fetch_schema(session, force_refresh=False):
         response = session.get(FDIC_SCHEMA_URL, timeout=30)
         response.raise_for_status()
 
-        schema = yaml.safe_load(response.text)
+        # Parse the raw bytes so libyaml decodes them, not requests' charset guess
+        schema = yaml.load(response.content, Loader=YamlLoader)
 
         # Extract field descriptions
         descriptions = {}
@@ -120,16 +160,37 @@ def fetch_schema(session, force_refresh=False):
         return {}
 
 
-def download_file(url, output_path, delay=1.0):
+def load_download_state(output_dir):
+    """Load per-year API download state, or an empty dict if none exists."""
+    try:
+        with open(Path(output_dir) / DOWNLOAD_STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_download_state(output_dir, year, status, count):
+    """Record the API download status ('empty' or 'ok') for a year."""
+    state = load_download_state(output_dir)
+    state[str(year)] = {'status': status, 'count': count, 'ts': time.time()}
+
+    state_path = Path(output_dir) / DOWNLOAD_STATE_FILE
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(state_path, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def download_file(session, url, output_path, delay=1.0):
     """Download a file with progress bar and retry logic.
 
     Args:
+        session: Requests session
         url: URL to download from
         output_path: Path to save file
         delay: Delay before download (respectful crawling)
 
     Returns:
-        True if successful, False otherwise
+        Number of bytes written, or None on failure
     """
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -139,36 +200,35 @@ def download_file(url, output_path, delay=1.0):
         time.sleep(delay)
 
     try:
-        response = requests.get(url, stream=True, timeout=30)
+        response = session.get(url, stream=True, timeout=30,
+                               headers={'Accept': '*/*'})
         response.raise_for_status()
 
         total_size = int(response.headers.get('content-length', 0))
 
+        # Copy in 1 MiB reads with shutil instead of a Python loop over
+        # 8 KB chunks; urllib3 still undoes any content encoding
+        response.raw.decode_content = True
+
         with open(output_path, 'wb') as f:
             if total_size > 0:
-                with tqdm(total=total_size, unit='B', unit_scale=True,
-                         desc=output_path.name, leave=False) as pbar:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if not chunk:
-                            continue
-                        size = f.write(chunk)
-                        pbar.update(size)
+                with tqdm.wrapattr(response.raw, 'read', total=total_size,
+                                   unit='B', unit_scale=True,
+                                   desc=output_path.name, leave=False) as raw:
+                    shutil.copyfileobj(raw, f, length=COPY_BUFFER_SIZE)
             else:
                 # No content-length header
-                for chunk in response.iter_content(chunk_size=8192):
-                    if not chunk:
-                        continue
-                    f.write(chunk)
+                shutil.copyfileobj(response.raw, f, length=COPY_BUFFER_SIZE)
 
-        return True
+            return f.tell()
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
         print(f"  [ERROR] Failed to download {url}: {e}")
-        return False
+        return None
 
 
 def get_record_count_api(session, year, api_key=None):
-    """Get total record count for a year via API."""
+    """Get total record count for a year via API, or None if the request fails."""
     try:
         params = {
             'filters': f'YEAR:{year}',
@@ -182,16 +242,16 @@ def get_record_count_api(session, year, api_key=None):
         response = session.get(FDIC_API_BASE_URL, params=params, timeout=30)
         response.raise_for_status()
 
-        data = response.json()
+        data = parse_json(response)
         return data.get('meta', {}).get('total', 0)
 
     except Exception as e:
         print(f"  [WARNING] Could not get record count: {e}")
-        return 0
+        return None
 
 
 def download_year_api_chunk(session, year, offset, limit, api_key=None):
-    """Download a chunk of data from the API."""
+    """Download a chunk of data from the API as a list of record dicts."""
     try:
         params = {
             'filters': f'YEAR:{year}',
@@ -207,7 +267,7 @@ def download_year_api_chunk(session, year, offset, limit, api_key=None):
         response = session.get(FDIC_API_BASE_URL, params=params, timeout=60)
         response.raise_for_status()
 
-        data = response.json()
+        data = parse_json(response)
         records = data.get('data', [])
 
         if not records:
@@ -216,17 +276,125 @@ def download_year_api_chunk(session, year, offset, limit, api_key=None):
         # Extract actual data from nested 'data' field
         # API returns: [{'data': {...}, 'score': 0}, ...]
         # We need: [{...}, ...]
-        flat_records = [record.get('data', record) for record in records]
-
-        df = pd.DataFrame(flat_records)
-        return df
+        return [record.get('data', record) for record in records]
 
     except Exception as e:
         print(f"  [ERROR] API request failed at offset {offset}: {e}")
         return None
 
 
-def download_year_api(session, year, output_dir, api_key=None, delay=0.5):
+def uppercase_keys(records):
+    """Key records by uppercase field names, copying only when needed.
+
+    Field names are checked once per chunk on the first record rather than
+    upper-casing every key of every record.
+    """
+    upper = {k: k.upper() for k in records[0]}
+
+    if all(k == u for k, u in upper.items()):
+        return records
+
+    return [{upper.get(k, k.upper()): v for k, v in r.items()} for r in records]
+
+
+def write_chunks_csv(chunks, output_path, pbar):
+    """Append record chunks to a CSV file.
+
+    Columns are the union of keys across all records, in first-seen order.
+    If a later chunk brings new keys, the file is rewritten once at the end
+    with the full header and earlier rows padded with empty values.
+
+    Returns:
+        Tuple of (records written, chunks written, bytes written)
+    """
+    n_records = 0
+    n_chunks = 0
+    fieldnames = []
+    header_grew = False
+
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        for rows in chunks:
+            new_keys = [k for k in dict.fromkeys(k for r in rows for k in r)
+                        if k not in fieldnames]
+            if writer is None:
+                fieldnames.extend(new_keys)
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+            elif new_keys:
+                # New columns go on the end, so rows written so far stay
+                # aligned with the header as a prefix
+                fieldnames.extend(new_keys)
+                writer.fieldnames = fieldnames
+                header_grew = True
+
+            writer.writerows(rows)
+            n_records += len(rows)
+            n_chunks += 1
+            pbar.update(len(rows))
+
+        n_bytes = f.tell()
+
+    if header_grew:
+        n_bytes = rewrite_csv_header(output_path, fieldnames)
+
+    return n_records, n_chunks, n_bytes
+
+
+def rewrite_csv_header(csv_path, fieldnames):
+    """Rewrite a CSV with a wider header, padding short rows to match.
+
+    Returns:
+        Bytes written
+    """
+    tmp_path = csv_path.with_name(csv_path.name + '.tmp')
+    width = len(fieldnames)
+
+    with open(csv_path, 'r', newline='', encoding='utf-8') as src, \
+            open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        next(reader, None)
+        writer.writerow(fieldnames)
+        for row in reader:
+            writer.writerow(row + [''] * (width - len(row)))
+        n_bytes = dst.tell()
+
+    os.replace(tmp_path, csv_path)
+    return n_bytes
+
+
+def write_chunks_parquet(chunks, output_path, pbar):
+    """Write record chunks to a parquet file.
+
+    Returns:
+        Tuple of (records written, chunks written, bytes written)
+    """
+    tables = []
+    n_records = 0
+
+    for rows in chunks:
+        # Build columns over every key in the page, not just the first row's
+        keys = dict.fromkeys(k for r in rows for k in r)
+        tables.append(pa.Table.from_pydict({k: [r.get(k) for r in rows] for k in keys}))
+        n_records += len(rows)
+        pbar.update(len(rows))
+
+    if not tables:
+        return 0, 0, 0
+
+    # Pages can infer different types for the same column (e.g. a column
+    # that is entirely null on one page), so promote to a common schema
+    table = pa.concat_tables(tables, promote_options='permissive')
+    with pa.OSFile(str(output_path), 'wb') as sink:
+        pq.write_table(table, sink, compression='zstd')
+        n_bytes = sink.tell()
+
+    return n_records, len(tables), n_bytes
+
+
+def download_year_api(session, year, output_dir, api_key=None, delay=0.5,
+                      concurrency=4, output_format='parquet'):
     """Download SOD data for a year using the FDIC API.
 
     Args:
@@ -235,72 +403,100 @@ def download_year_api(session, year, output_dir, api_key=None, delay=0.5):
         output_dir: Output directory
         api_key: Optional API key
         delay: Delay between API requests
+        concurrency: Number of pages fetched concurrently
+        output_format: 'parquet' or 'csv'
 
     Returns:
         True if successful, False otherwise
     """
-    output_path = Path(output_dir) / f"ALL_{year}.csv"
+    filename = f"ALL_{year}.{output_format}"
+    output_path = Path(output_dir) / filename
 
     # Skip if already exists
-    if output_path.exists():
-        print(f"[{year}] Already exists: ALL_{year}.csv")
+    try:
+        st = os.stat(output_path)
+    except FileNotFoundError:
+        st = None
+
+    if st is not None:
+        print(f"[{year}] Already exists: {filename} ({st.st_size / (1024 * 1024):.2f} MB)")
         return True
 
+    # Skip years recently found to have no records
+    year_state = load_download_state(output_dir).get(str(year))
+    if (year_state and year_state.get('status') == 'empty'
+            and time.time() - year_state.get('ts', 0) < EMPTY_YEAR_TTL):
+        print(f"[{year}] No records found on a recent run, skipping (see {DOWNLOAD_STATE_FILE})")
+        return False
+
     print(f"[{year}] Downloading via API...")
 
     # Get total record count
     total_records = get_record_count_api(session, year, api_key)
 
+    if total_records is None:
+        return False
+
     if total_records == 0:
+        record_download_state(output_dir, year, 'empty', 0)
         print(f"  [WARNING] No records found for year {year}")
         return False
 
     print(f"  Total records: {total_records:,}")
 
-    # Download in chunks
-    all_chunks = []
-    offset = 0
+    def fetch_chunk(offset):
+        # Respectful delay between requests issued by each worker
+        if offset > 0:
+            time.sleep(delay)
+        return download_year_api_chunk(session, year, offset, FDIC_API_MAX_LIMIT, api_key)
 
-    with tqdm(total=total_records, desc=f"  Progress", unit=" records") as pbar:
-        while offset < total_records:
-            chunk = download_year_api_chunk(session, year, offset, FDIC_API_MAX_LIMIT, api_key)
-
-            if chunk is None or len(chunk) == 0:
-                break
-
-            all_chunks.append(chunk)
-            offset += len(chunk)
-            pbar.update(len(chunk))
-
-            # Respectful delay between requests
-            if offset < total_records:
-                time.sleep(delay)
+    # Download in chunks; pages are fetched concurrently on the shared
+    # session but consumed in offset order and handed straight to the writer
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = output_path.with_name(filename + '.part')
+    offsets = range(0, total_records, FDIC_API_MAX_LIMIT)
+    write_chunks = write_chunks_parquet if output_format == 'parquet' else write_chunks_csv
 
-    if not all_chunks:
+    print(f"  Saving to: {filename}")
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        with tqdm(total=total_records, desc=f"  Progress", unit=" records") as pbar:
+            # Stop at the first failed or empty page; uppercase column names
+            # for consistency with legacy format
+            chunks = (
+                uppercase_keys(records)
+                for records in takewhile(bool, executor.map(fetch_chunk, offsets))
+            )
+            n_records, n_chunks, n_bytes = write_chunks(chunks, part_path, pbar)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if n_chunks == 0:
+        part_path.unlink(missing_ok=True)
         print(f"  [ERROR] Failed to download any data for year {year}")
         return False
 
-    # Combine all chunks
-    print(f"  Combining {len(all_chunks)} chunks...")
-    df = pd.concat(all_chunks, ignore_index=True)
-
-    # Standardize column names to uppercase for consistency with legacy format
-    df.columns = df.columns.str.upper()
+    # A failed page ends the stream early; never keep a truncated year
+    if n_records < total_records:
+        part_path.unlink(missing_ok=True)
+        print(f"  [ERROR] Download incomplete for year {year}: "
+              f"got {n_records:,} of {total_records:,} records")
+        return False
 
-    # Save to CSV
-    print(f"  Saving to: ALL_{year}.csv")
-    df.to_csv(output_path, index=False)
+    part_path.replace(output_path)
+    record_download_state(output_dir, year, 'ok', n_records)
 
-    file_size_mb = output_path.stat().st_size / (1024 * 1024)
-    print(f"  Successfully saved {len(df):,} records ({file_size_mb:.2f} MB)")
+    file_size_mb = n_bytes / (1024 * 1024)
+    print(f"  Successfully saved {n_records:,} records from {n_chunks} chunks ({file_size_mb:.2f} MB)")
 
     return True
 
 
-def download_year_bulk(year, output_dir, delay=1.0):
+def download_year_bulk(session, year, output_dir, delay=1.0):
     """Download SOD data for 1987-1993 via FDIC FOIA bulk download.
 
     Args:
+        session: Requests session
         year: Year to download (1987-1993)
         output_dir: Output directory
         delay: Delay before download
@@ -313,16 +509,21 @@ def download_year_bulk(year, output_dir, delay=1.0):
     output_path = Path(output_dir) / filename
 
     # Skip if already exists
-    if output_path.exists():
-        print(f"[{year}] Already exists: {filename}")
+    try:
+        st = os.stat(output_path)
+    except FileNotFoundError:
+        st = None
+
+    if st is not None:
+        print(f"[{year}] Already exists: {filename} ({st.st_size / (1024 * 1024):.1f} MB)")
         return True
 
     # Download
     print(f"[{year}] Downloading {filename}...")
-    success = download_file(url, output_path, delay=delay)
+    n_bytes = download_file(session, url, output_path, delay=delay)
 
-    if success:
-        file_size = output_path.stat().st_size / (1024 * 1024)  # MB
+    if n_bytes is not None:
+        file_size = n_bytes / (1024 * 1024)  # MB
         print(f"[{year}] Downloaded {filename} ({file_size:.1f} MB)")
         return True
     else:
@@ -348,7 +549,7 @@ Examples:
 
 Data Sources:
   1987-1993: FDIC FOIA bulk download (ZIP files, ~7 MB each)
-  1994-2025: FDIC Banks API (CSV files, ~140 MB each)
+  1994-2025: FDIC Banks API (parquet files, or CSV ~140 MB each)
 
 API Key:
   Not required but recommended to avoid rate limits.
@@ -396,6 +597,21 @@ Notes:
         help='Delay between API requests in seconds (default: 0.5)'
     )
 
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Number of API pages fetched concurrently per year (default: 4)'
+    )
+
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=['parquet', 'csv'],
+        default='parquet',
+        help='File format for API downloads (default: parquet)'
+    )
+
     parser.add_argument(
         '--refresh-schema',
         action='store_true',
@@ -429,10 +645,13 @@ Notes:
     print(f"Output directory: {args.output_dir}")
     print(f"API key: {'Provided' if api_key else 'Not provided (may have rate limits)'}")
     print(f"Delay between requests: {args.delay}s")
+    print(f"API concurrency: {args.concurrency}")
+    print(f"API output format: {args.format}")
     print("="*80)
 
-    # Create session for API requests
-    session = create_session()
+    # Create one session shared by bulk and API requests, pooling one
+    # connection per concurrent page fetch
+    session = create_session(pool_maxsize=max(args.concurrency, 1))
 
     # Fetch and cache schema (for use by parse.py)
     if not args.skip_schema:
@@ -447,11 +666,13 @@ Notes:
         try:
             if year <= 1993:
                 # Use bulk download
-                success = download_year_bulk(year, args.output_dir, delay=args.delay)
+                success = download_year_bulk(session, year, args.output_dir, delay=args.delay)
             else:
                 # Use API
                 success = download_year_api(session, year, args.output_dir,
-                                           api_key=api_key, delay=args.delay)
+                                           api_key=api_key, delay=args.delay,
+                                           concurrency=args.concurrency,
+                                           output_format=args.format)
 
             if success:
                 successful.append(year)
@@ -1,12 +1,13 @@
 """
 Extract Summary of Deposits data from ZIP files to parquet format.
 
-This script processes downloaded SOD files (ZIP or CSV) and converts them to
-standardized parquet format with parallelization support.
+This script processes downloaded SOD files (ZIP, CSV or parquet) and converts
+them to standardized parquet format with parallelization support.
 
 Handles multiple file formats:
 - sod-{year}.zip (1987-1993): FDIC FOIA bulk download
-- ALL_{year}.csv (1994-2025): FDIC Banks API format
+- ALL_{year}.parquet (1994-2025): FDIC Banks API format
+- ALL_{year}.csv (1994-2025): FDIC Banks API format (download.py --format csv)
 
 Usage:
     # Extract all files with default parallelization
@@ -28,117 +29,267 @@ Usage:
 """
 
 import pandas as pd
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import pyarrow.parquet as pq
 import zipfile
+import codecs
+import io
 import argparse
 import sys
+import os
 import json
 import requests
 import yaml
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 import multiprocessing
 import re
+import functools
+import itertools
+import logging
+import logging.handlers
+
+# Use libyaml's C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
 # FDIC schema URL
 FDIC_SCHEMA_URL = "https://api.fdic.gov/banks/docs/sod_properties.yaml"
 SCHEMA_CACHE_FILE = Path(__file__).parent / "data" / ".sod_schema_cache.json"
+SCHEMA_HEADERS_FILE = Path(__file__).parent / "data" / ".sod_schema_headers.json"
+SCHEMA_TYPES_CACHE_FILE = Path(__file__).parent / "data" / ".sod_schema_types.json"
+
+# Arrow types used when reading CSV columns declared in the FDIC schema
+FDIC_ARROW_TYPES = {
+    'integer': pa.int64(),
+    'number': pa.float64(),
+    'string': pa.string(),
+}
+
+# Raw file types accepted by main (matched case-insensitively)
+INPUT_EXTENSIONS = ('.zip', '.csv', '.parquet')
+
+# Year in raw file names: sod-{year}.zip or ALL_{year}.csv/.parquet
+YEAR_PATTERN = re.compile(r'(?:sod-|ALL_)(\d{4})')
+
+# Bytes per block handed to each Arrow CSV parsing thread
+CSV_BLOCK_SIZE = 8 << 20
+
+# Bytes sampled from the start of a CSV to guess its encoding
+ENCODING_SAMPLE_SIZE = 64 << 10
+
+# Column index in Arrow CSV conversion errors ("In CSV column #3: ...")
+CSV_COLUMN_ERROR_PATTERN = re.compile(r'CSV column #(\d+)')
+
+# Byte order marks and the encodings they identify
+ENCODING_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Parquet writer sizing: rows per row group (a year of branches fits in one),
+# rows per encoder batch and target bytes per data page
+PARQUET_ROW_GROUP_ROWS = 1 << 20
+PARQUET_WRITE_BATCH_SIZE = 8192
+PARQUET_DATA_PAGE_SIZE = 2 << 20
+
+# Bytes buffered before each write to the output file
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Compression level used when writing zstd parquet files
+ZSTD_COMPRESSION_LEVEL = 3
+
+
+def load_cached_descriptions():
+    """Load field descriptions from the schema cache, or None if unavailable."""
+    try:
+        with open(SCHEMA_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def load_column_types():
+    """
+    Load FDIC field types cached by fetch_field_descriptions.
+
+    Returns:
+        Dict mapping field names (uppercase) to FDIC types ('integer',
+        'number', 'string'), or None if not cached
+    """
+    try:
+        with open(SCHEMA_TYPES_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def parse_schema(content):
+    """
+    Parse the FDIC YAML schema into field descriptions and types.
+
+    Args:
+        content: Raw bytes of the YAML schema
+
+    Returns:
+        Tuple of (descriptions, column_types) dicts keyed by uppercase field name
+    """
+    # Parse the raw bytes so libyaml decodes them, not requests' charset guess
+    schema = yaml.load(content, Loader=YamlLoader)
+
+    descriptions = {}
+    column_types = {}
+    properties = schema.get('properties', {}).get('data', {}).get('properties', {})
+
+    for field_name, field_def in properties.items():
+        title = field_def.get('title', '')
+        desc = field_def.get('description', '')
+        # Use title as primary, description as fallback
+        descriptions[field_name.upper()] = title or desc or ''
+
+        if field_def.get('type'):
+            column_types[field_name.upper()] = field_def['type']
+
+    # Add our custom field
+    descriptions['REPORTING_PERIOD'] = 'Reporting date (June 30 of data year)'
+
+    return descriptions, column_types
+
+
+def save_column_types(column_types):
+    """Write FDIC field types to the types cache."""
+    SCHEMA_TYPES_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(SCHEMA_TYPES_CACHE_FILE, 'w') as f:
+        json.dump(column_types, f, indent=2)
 
 
 def fetch_field_descriptions(use_cache=True):
     """
     Fetch field descriptions from FDIC YAML schema.
 
+    When refreshing an existing cache, the request is conditional on the
+    ETag/Last-Modified of the cached copy, so an unchanged schema is not
+    downloaded or parsed again. A successful download also refreshes the
+    field types cache.
+
     Args:
         use_cache: Use cached schema if available
 
     Returns:
         Dict mapping field names (uppercase) to descriptions
     """
+    cached = load_cached_descriptions()
+
     # Try cache first
-    if use_cache and SCHEMA_CACHE_FILE.exists():
+    if use_cache and cached is not None:
+        return cached
+
+    # Revalidate the cached copy if we have one
+    request_headers = {}
+    if cached is not None:
         try:
-            with open(SCHEMA_CACHE_FILE, 'r') as f:
-                return json.load(f)
+            with open(SCHEMA_HEADERS_FILE, 'r') as f:
+                validators = json.load(f)
+            if validators.get('etag'):
+                request_headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                request_headers['If-Modified-Since'] = validators['last_modified']
         except Exception:
             pass
 
     # Fetch from FDIC
     try:
         print("Fetching field descriptions from FDIC...")
-        response = requests.get(FDIC_SCHEMA_URL, timeout=30)
-        response.raise_for_status()
-
-        schema = yaml.safe_load(response.text)
+        response = requests.get(FDIC_SCHEMA_URL, headers=request_headers, timeout=30)
 
-        # Extract field descriptions
-        descriptions = {}
-        properties = schema.get('properties', {}).get('data', {}).get('properties', {})
+        if response.status_code == 304:
+            print(f"  Schema unchanged, using cache ({len(cached)} field descriptions)")
+            return cached
 
-        for field_name, field_def in properties.items():
-            title = field_def.get('title', '')
-            desc = field_def.get('description', '')
-            # Use title as primary, description as fallback
-            descriptions[field_name.upper()] = title or desc or ''
+        response.raise_for_status()
 
-        # Add our custom field
-        descriptions['REPORTING_PERIOD'] = 'Reporting date (June 30 of data year)'
+        descriptions, column_types = parse_schema(response.content)
 
-        # Cache for future use
+        # Cache for future use, with validators for conditional refreshes
         SCHEMA_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
         with open(SCHEMA_CACHE_FILE, 'w') as f:
             json.dump(descriptions, f, indent=2)
 
+        save_column_types(column_types)
+
+        with open(SCHEMA_HEADERS_FILE, 'w') as f:
+            json.dump({
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }, f, indent=2)
+
         print(f"  Loaded {len(descriptions)} field descriptions")
         return descriptions
 
     except Exception as e:
         print(f"  Warning: Could not fetch schema: {e}")
+        if cached is not None:
+            print(f"  Using cached field descriptions ({len(cached)})")
+            return cached
+        return {}
+
+
+def fetch_column_types():
+    """
+    Get FDIC field types, from the types cache or else from the YAML schema.
+
+    The descriptions cache (which 01_download.py also writes) is independent
+    of this one, so a missing types cache never forces a descriptions fetch.
+
+    Returns:
+        Dict mapping field names (uppercase) to FDIC types, or an empty dict
+        if unavailable (CSV column types are then inferred)
+    """
+    column_types = load_column_types()
+    if column_types is not None:
+        return column_types
+
+    try:
+        print("Fetching field types from FDIC...")
+        response = requests.get(FDIC_SCHEMA_URL, timeout=30)
+        response.raise_for_status()
+
+        _, column_types = parse_schema(response.content)
+        save_column_types(column_types)
+
+        print(f"  Loaded {len(column_types)} field types")
+        return column_types
+
+    except Exception as e:
+        print(f"  Warning: Could not fetch field types, inferring instead: {e}")
         return {}
 
 
-def create_parquet_schema(df, descriptions):
+def create_parquet_schema(schema, descriptions):
     """
     Create PyArrow schema with field descriptions as metadata.
 
     Args:
-        df: DataFrame to create schema for
+        schema: PyArrow schema of the data
         descriptions: Dict mapping field names to descriptions
 
     Returns:
         PyArrow schema with metadata
     """
     fields = []
-    for col in df.columns:
-        dtype = df[col].dtype
-
-        # Determine PyArrow type based on pandas dtype
-        if pd.api.types.is_datetime64_any_dtype(dtype):
-            pa_type = pa.timestamp('ns')
-        elif pd.api.types.is_integer_dtype(dtype):
-            pa_type = pa.int64()
-        elif pd.api.types.is_float_dtype(dtype):
-            pa_type = pa.float64()
-        elif pd.api.types.is_bool_dtype(dtype):
-            pa_type = pa.bool_()
-        elif dtype == 'object' or pd.api.types.is_string_dtype(dtype):
-            pa_type = pa.string()
-        else:
-            # Fallback: try automatic conversion, default to string
-            try:
-                pa_type = pa.from_numpy_dtype(dtype)
-            except (pa.ArrowNotImplementedError, pa.ArrowInvalid):
-                pa_type = pa.string()
-
+    for field in schema:
         # Get description for this field
-        desc = descriptions.get(col.upper(), '')
+        desc = descriptions.get(field.name.upper(), '')
 
-        # Create field with metadata
+        # Attach description as field metadata
         if desc:
-            field = pa.field(col, pa_type, metadata={'description': desc.encode('utf-8')})
-        else:
-            field = pa.field(col, pa_type)
+            field = field.with_metadata({'description': desc.encode('utf-8')})
 
         fields.append(field)
 
@@ -156,28 +307,265 @@ def extract_year_from_filename(filename):
     Returns:
         Year as integer or None if not found
     """
-    # Try sod-{year}.zip format
-    match = re.search(r'sod-(\d{4})', filename)
-    if match:
-        return int(match.group(1))
+    match = YEAR_PATTERN.search(filename)
+    return int(match.group(1)) if match else None
+
+
+def read_csv_once(open_source, encoding, column_types=None):
+    """Read CSV data into an Arrow Table with a single pass of the Arrow reader."""
+    with open_source() as f:
+        return pacsv.read_csv(
+            f,
+            read_options=pacsv.ReadOptions(
+                use_threads=True, block_size=CSV_BLOCK_SIZE, encoding=encoding
+            ),
+            convert_options=pacsv.ConvertOptions(
+                strings_can_be_null=True, column_types=column_types or {}
+            ),
+        )
 
-    # Try ALL_{year} format
-    match = re.search(r'ALL_(\d{4})', filename)
-    if match:
-        return int(match.group(1))
 
-    return None
+def csv_column_names(open_source, encoding):
+    """Read the header names of a CSV with the Arrow streaming reader."""
+    with open_source() as f:
+        return pacsv.open_csv(
+            f, read_options=pacsv.ReadOptions(encoding=encoding)
+        ).schema.names
 
 
-def process_sod_zip(zip_path):
+def detect_encoding(head_bytes):
+    """
+    Guess the text encoding of a CSV from its first bytes.
+
+    Args:
+        head_bytes: Sample from the start of the file
+
+    Returns:
+        Encoding name: from the byte order mark if present, else 'utf-8' if
+        the sample decodes as UTF-8, else 'latin-1'
+    """
+    for bom, encoding in ENCODING_BOMS:
+        if head_bytes.startswith(bom):
+            return encoding
+
+    try:
+        # Incremental decoder tolerates a character cut off at the sample end
+        codecs.getincrementaldecoder('utf-8')().decode(head_bytes)
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+    return 'utf-8'
+
+
+def read_csv_arrow(open_source, encoding, column_types, source_name):
+    """
+    Read CSV data with the Arrow reader, dropping declared column types
+    that the data does not fit one column at a time.
+
+    Returns:
+        Tuple of (table, column types that were applied)
+    """
+    declared = dict(column_types or {})
+    while True:
+        try:
+            table = read_csv_once(open_source, encoding, declared)
+            break
+        except pa.ArrowInvalid as e:
+            # Only conversion errors name a column; parse errors propagate
+            match = CSV_COLUMN_ERROR_PATTERN.search(str(e))
+            if not declared or not match:
+                raise
+            names = csv_column_names(open_source, encoding)
+            index = int(match.group(1))
+            if not (index < len(names) and names[index] in declared):
+                raise
+            # Drop only the column that does not fit and retry
+            name = names[index]
+            print(f"  Warning: {source_name}: {name} does not fit type "
+                  f"{declared.pop(name)}, inferring it instead")
+
+    # Arrow parses date-time text into timestamps, which would not give
+    # back the original text when cast, so read those columns as strings
+    temporal = {
+        field.name: pa.string() for field in table.schema
+        if field.name not in declared
+        and (pa.types.is_timestamp(field.type) or pa.types.is_time(field.type))
+    }
+    if temporal:
+        declared = {**declared, **temporal}
+        table = read_csv_once(open_source, encoding, declared)
+
+    return table, declared
+
+
+def read_csv_pandas(open_source, encodings, column_types=None):
+    """Read CSV data with pandas.read_csv, trying each encoding in turn."""
+    with open_source() as f:
+        raw = f.read()
+
+    # Declared text columns are read as text so codes keep leading zeros
+    dtype = {name: str for name, t in (column_types or {}).items() if pa.types.is_string(t)}
+
+    for encoding in encodings[:-1]:
+        try:
+            df = pd.read_csv(io.BytesIO(raw), encoding=encoding, dtype=dtype, low_memory=False)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        df = pd.read_csv(io.BytesIO(raw), encoding=encodings[-1], dtype=dtype,
+                         low_memory=False)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Newer pandas hands text over as large_string; match the Arrow reader
+    for i, field in enumerate(table.schema):
+        if pa.types.is_large_string(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+
+    return table
+
+
+def read_csv_table(open_source, column_types=None, source_name='CSV'):
+    """
+    Read CSV data into an Arrow Table using the multithreaded Arrow reader.
+
+    The encoding is guessed from the first bytes of the file, falling back
+    to Latin-1 if invalid UTF-8 turns up later. Columns listed in
+    column_types are converted straight to those types; a column whose data
+    does not fit its type is reported and inferred instead, one column at a
+    time. Inferred types are kept in line with what pandas.read_csv
+    produced: all-empty columns and integer columns with blanks become
+    float64, and ISO dates and date-times stay as text.
+
+    Files the Arrow reader cannot take as pandas did (rows with missing
+    fields, repeated header names) are read with pandas.read_csv instead.
+
+    Args:
+        open_source: Callable returning a fresh binary stream of the CSV
+        column_types: Optional dict mapping column names to Arrow types
+        source_name: Name of the data source, used in warnings
+
+    Returns:
+        PyArrow Table
+    """
+    with open_source() as f:
+        encoding = detect_encoding(f.read(ENCODING_SAMPLE_SIZE))
+
+    encodings = [encoding] if encoding == 'latin-1' else [encoding, 'latin-1']
+
+    try:
+        for encoding in encodings:
+            table, declared = read_csv_arrow(open_source, encoding, column_types, source_name)
+
+            # Arrow reads text that is not valid UTF-8 as binary columns
+            if not any(pa.types.is_binary(t) for t in table.schema.types):
+                break
+    except pa.ArrowInvalid as e:
+        print(f"  Warning: {source_name}: {e}; reading with pandas instead")
+        table = None
+
+    # pandas renamed repeated headers (A, A.1); Arrow keeps both as A
+    if table is not None and len(set(table.column_names)) < table.num_columns:
+        print(f"  Warning: {source_name}: repeated column names; reading with pandas instead")
+        table = None
+
+    if table is None:
+        table, declared = cast_declared_types(read_csv_pandas(open_source, encodings, column_types),
+                                              column_types)
+
+    return normalize_inferred_types(table, declared)
+
+
+def cast_declared_types(table, column_types):
+    """
+    Cast the columns of an already-read table to their declared types.
+
+    A column whose values do not fit keeps the type it has.
+
+    Args:
+        table: PyArrow Table
+        column_types: Optional dict mapping column names to Arrow types
+
+    Returns:
+        Tuple of (table, names of the columns that were cast)
+    """
+    declared = set()
+
+    for i, field in enumerate(table.schema):
+        target = (column_types or {}).get(field.name)
+        if target is None:
+            continue
+        try:
+            table = table.set_column(i, field.name, table.column(i).cast(target))
+            declared.add(field.name)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            pass
+
+    return table, declared
+
+
+def normalize_inferred_types(table, declared=()):
+    """
+    Keep inferred column types in line with what pandas.read_csv produced.
+
+    All-empty columns and integer columns with nulls become float64, and
+    dates become text. Integer columns named in declared are left alone.
+
+    Args:
+        table: PyArrow Table
+        declared: Column names whose types were declared rather than inferred
+
+    Returns:
+        PyArrow Table
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+        elif pa.types.is_date(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        elif (pa.types.is_integer(field.type) and field.name not in declared
+                and table.column(i).null_count):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+
+    return table
+
+
+def csv_column_types(schema_types):
+    """
+    Map FDIC schema types to Arrow types for the CSV reader.
+
+    Args:
+        schema_types: Dict mapping field names (uppercase) to FDIC types
+
+    Returns:
+        Dict mapping column names (upper and lower case) to Arrow types
+    """
+    column_types = {}
+    for field_name, field_type in schema_types.items():
+        # CERT may hold junk values; standardize_sod_data coerces it
+        if field_name == 'CERT':
+            continue
+
+        pa_type = FDIC_ARROW_TYPES.get(field_type)
+        if pa_type is not None:
+            # Older bulk files use lowercase headers
+            column_types[field_name] = pa_type
+            column_types[field_name.lower()] = pa_type
+
+    return column_types
+
+
+def process_sod_zip(zip_path, column_types=None):
     """
     Extract SOD data from ZIP file.
 
     Args:
         zip_path: Path to ZIP file
+        column_types: Optional dict mapping column names to Arrow types
 
     Returns:
-        DataFrame with standardized columns
+        PyArrow Table with raw columns
     """
     with zipfile.ZipFile(zip_path, 'r') as zf:
         # Find CSV file (varies by year)
@@ -186,39 +574,51 @@ def process_sod_zip(zip_path):
         if not csv_files:
             raise ValueError(f"No CSV found in {zip_path}")
 
-        # Read first CSV
-        with zf.open(csv_files[0]) as f:
-            # Try different encodings
-            try:
-                df = pd.read_csv(f, encoding='utf-8', low_memory=False)
-            except UnicodeDecodeError:
-                f.seek(0)
-                df = pd.read_csv(f, encoding='latin-1', low_memory=False)
+        # Decompress the first CSV once; retries re-read the buffer
+        raw = zf.read(csv_files[0])
 
-    return df
+    return read_csv_table(lambda: pa.BufferReader(raw), column_types,
+                          f"{Path(zip_path).name}/{csv_files[0]}")
 
 
-def process_sod_csv(csv_path):
+def process_sod_csv(csv_path, column_types=None):
     """
     Read SOD data from CSV file (1994+ format).
 
     Args:
         csv_path: Path to CSV file
+        column_types: Optional dict mapping column names to Arrow types
 
     Returns:
-        DataFrame with standardized columns
+        PyArrow Table with raw columns
     """
-    try:
-        df = pd.read_csv(csv_path, encoding='utf-8', low_memory=False)
-    except UnicodeDecodeError:
-        df = pd.read_csv(csv_path, encoding='latin-1', low_memory=False)
+    return read_csv_table(lambda: pa.input_stream(str(csv_path)), column_types,
+                          Path(csv_path).name)
+
+
+def process_sod_parquet(parquet_path, column_types=None):
+    """
+    Read SOD data from parquet file (1994+ API download).
 
-    return df
+    Columns listed in column_types are cast to those types; a column whose
+    values do not fit keeps the type it was stored with. Other columns get
+    the same normalization as inferred CSV columns, so API years match the
+    CSV years whichever format they were downloaded in.
 
+    Args:
+        parquet_path: Path to parquet file
+        column_types: Optional dict mapping column names to Arrow types
 
-def standardize_sod_data(df, year):
+    Returns:
+        PyArrow Table with raw columns
     """
-    Standardize SOD DataFrame.
+    table, declared = cast_declared_types(pq.read_table(parquet_path), column_types)
+    return normalize_inferred_types(table, declared)
+
+
+def standardize_sod_data(table, year):
+    """
+    Standardize SOD Arrow Table.
 
     - Uppercase column names
     - Add REPORTING_PERIOD
@@ -226,55 +626,134 @@ def standardize_sod_data(df, year):
     - Order columns consistently
 
     Args:
-        df: Raw DataFrame
+        table: Raw PyArrow Table
         year: Year of data
 
     Returns:
-        Standardized DataFrame
+        Standardized PyArrow Table
     """
     # Uppercase column names and strip whitespace
-    df.columns = [str(col).upper().strip() for col in df.columns]
-
-    # Add REPORTING_PERIOD (June 30 of year)
-    df['REPORTING_PERIOD'] = pd.Timestamp(year=year, month=6, day=30)
+    table = table.rename_columns([str(col).upper().strip() for col in table.column_names])
+
+    # Add REPORTING_PERIOD (June 30 of year) as a one-entry dictionary, so the
+    # constant column costs one byte per row and is written as a single run.
+    # The zeroed numpy indices are wrapped without a copy.
+    reporting_period = pa.DictionaryArray.from_arrays(
+        np.zeros(table.num_rows, dtype=np.int8),
+        np.array([f'{year}-06-30'], dtype='datetime64[ns]'),
+    )
+    table = table.append_column('REPORTING_PERIOD', reporting_period)
 
     # Ensure CERT is integer (primary identifier)
-    if 'CERT' in df.columns:
-        df['CERT'] = pd.to_numeric(df['CERT'], errors='coerce')
-        df = df.dropna(subset=['CERT'])
-        df['CERT'] = df['CERT'].astype(int)
-    else:
+    if 'CERT' not in table.column_names:
         raise ValueError(f"CERT column not found in data for year {year}")
 
+    cert_idx = table.schema.get_field_index('CERT')
+    cert = table.column(cert_idx)
+
+    if pa.types.is_integer(cert.type) or pa.types.is_floating(cert.type):
+        # Already numeric: drop missing values and cast, no re-parsing
+        if pa.types.is_floating(cert.type):
+            valid = pc.fill_null(pc.invert(pc.is_nan(cert)), False)
+        elif cert.null_count:
+            valid = pc.is_valid(cert)
+        else:
+            valid = None
+
+        if valid is not None and not pc.all(valid).as_py():
+            table = table.filter(valid)
+
+        if cert.type != pa.int64():
+            table = table.set_column(cert_idx, 'CERT',
+                                     pc.cast(table.column(cert_idx), pa.int64(), safe=False))
+    else:
+        cert = pd.to_numeric(cert.to_pandas(), errors='coerce')
+        valid = cert.notna().to_numpy()
+        if not valid.all():
+            table = table.filter(pa.array(valid))
+        table = table.set_column(cert_idx, 'CERT', pa.array(cert[valid].to_numpy(dtype='int64')))
+
     # Standardize column order
     id_cols = ['CERT', 'REPORTING_PERIOD']
 
     # Add other identifier columns if they exist
     optional_id_cols = ['UNINUMBR', 'BRNUM', 'YEAR']
     for col in optional_id_cols:
-        if col in df.columns and col not in id_cols:
+        if col in table.column_names and col not in id_cols:
             id_cols.append(col)
 
     # Data columns (alphabetical)
-    data_cols = sorted([c for c in df.columns if c not in id_cols])
+    data_cols = sorted([c for c in table.column_names if c not in id_cols])
+
+    # Reorder (only rearranges column references, no data is copied)
+    table = table.select(id_cols + data_cols)
+
+    return table
+
+
+# Per-process state set once by init_worker instead of being sent with every task
+_DESCRIPTIONS = {}
+_FIELD_METADATA = {}
+_COLUMN_TYPES = {}
+
+
+def init_worker(descriptions, schema_types, arrow_threads=None):
+    """
+    Initialize per-process state for process_file_wrapper.
+
+    Args:
+        descriptions: Dict mapping field names to descriptions
+        schema_types: Dict mapping field names to FDIC types
+        arrow_threads: Optional size of Arrow's CPU thread pool
+    """
+    global _DESCRIPTIONS, _FIELD_METADATA, _COLUMN_TYPES
+
+    _DESCRIPTIONS = descriptions
+    _COLUMN_TYPES = csv_column_types(schema_types)
 
-    # Reorder
-    df = df[id_cols + data_cols]
+    # Encode description metadata once rather than for every file
+    _FIELD_METADATA = {
+        name: {b'description': desc.encode('utf-8')}
+        for name, desc in descriptions.items() if desc
+    }
+    described_schema.cache_clear()
 
-    return df
+    if arrow_threads:
+        pa.set_cpu_count(arrow_threads)
+
+
+@functools.lru_cache(maxsize=64)
+def described_schema(fields):
+    """
+    Build the output schema for a column layout with init_worker's descriptions.
+
+    Memoized, since most years share the same columns and types.
+
+    Args:
+        fields: Tuple of (name, type, nullable) for each column
+
+    Returns:
+        PyArrow schema with metadata
+    """
+    return pa.schema([
+        pa.field(name, pa_type, nullable, metadata=_FIELD_METADATA.get(name.upper()))
+        for name, pa_type, nullable in fields
+    ])
 
 
 def process_file_wrapper(args_tuple):
     """
     Wrapper function for parallel processing.
 
+    Uses the descriptions and column types set by init_worker.
+
     Args:
-        args_tuple: (file_path_str, output_dir_str, descriptions_dict, force)
+        args_tuple: (file_path_str, output_dir_str, force, compression)
 
     Returns:
         Tuple of (status, year, message)
     """
-    file_path_str, output_dir_str, descriptions, force = args_tuple
+    file_path_str, output_dir_str, force, compression = args_tuple
 
     file_path = Path(file_path_str)
     output_dir = Path(output_dir_str)
@@ -293,28 +772,42 @@ def process_file_wrapper(args_tuple):
 
         # Process based on file type
         if file_path.suffix.lower() == '.zip':
-            df = process_sod_zip(file_path)
+            table = process_sod_zip(file_path, _COLUMN_TYPES)
         elif file_path.suffix.lower() == '.csv':
-            df = process_sod_csv(file_path)
+            table = process_sod_csv(file_path, _COLUMN_TYPES)
+        elif file_path.suffix.lower() == '.parquet':
+            table = process_sod_parquet(file_path, _COLUMN_TYPES)
         else:
             return ('error', year, f"Unsupported file type: {file_path.suffix}")
 
         # Standardize
-        df = standardize_sod_data(df, year)
+        table = standardize_sod_data(table, year)
 
         # Save as parquet with schema metadata
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        if descriptions:
-            # Create schema with field descriptions
-            schema = create_parquet_schema(df, descriptions)
-            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
-            pq.write_table(table, output_path, compression='snappy')
+        # Attach field descriptions to the file schema (none if disabled);
+        # the writer takes them from its own schema, so no cast is needed.
+        # Source fields with their own metadata skip the cached build.
+        if any(field.metadata for field in table.schema):
+            schema = create_parquet_schema(table.schema, _DESCRIPTIONS)
         else:
-            # Fallback to simple write
-            df.to_parquet(output_path, index=False, compression='snappy')
+            schema = described_schema(tuple((f.name, f.type, f.nullable) for f in table.schema))
+
+        compression_level = ZSTD_COMPRESSION_LEVEL if compression == 'zstd' else None
+
+        # Coalesce the writer's many small page writes into large ones
+        with pa.output_stream(str(output_path), buffer_size=OUTPUT_BUFFER_SIZE) as sink, \
+                pq.ParquetWriter(sink, schema, compression=compression,
+                                 compression_level=compression_level,
+                                 use_dictionary=True,
+                                 dictionary_pagesize_limit=2 << 20,
+                                 write_batch_size=PARQUET_WRITE_BATCH_SIZE,
+                                 data_page_size=PARQUET_DATA_PAGE_SIZE,
+                                 write_statistics=True) as writer:
+            writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_ROWS)
 
-        return ('success', year, f"{len(df):,} branches, {len(df.columns)-2} variables")
+        return ('success', year, f"{table.num_rows:,} branches, {table.num_columns-2} variables")
 
     except Exception as e:
         import traceback
@@ -322,9 +815,48 @@ def process_file_wrapper(args_tuple):
         return ('error', None, error_msg)
 
 
+def available_cpus():
+    """
+    Count the CPUs this process may run on.
+
+    Uses the scheduler affinity mask where available, so CPU pinning
+    (taskset, container cpusets) is respected; otherwise all CPUs.
+
+    Returns:
+        Number of usable CPUs
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+def buffered_results_logger():
+    """
+    Create a logger that writes per-file result lines to stdout in batches.
+
+    Lines are held in a MemoryHandler until it fills, an error is logged or
+    it is flushed explicitly.
+
+    Returns:
+        Tuple of (logger, MemoryHandler)
+    """
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter('%(message)s'))
+
+    buffer = logging.handlers.MemoryHandler(capacity=64, flushLevel=logging.ERROR,
+                                            target=stream)
+
+    logger = logging.getLogger('sod_parse.results')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers = [buffer]
+
+    return logger, buffer
+
+
 def main():
     parser = argparse.ArgumentParser(
-        description='Extract SOD data from ZIP/CSV files to parquet format',
+        description='Extract SOD data from ZIP/CSV/parquet files to parquet format',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
@@ -356,7 +888,7 @@ Output Format:
         '--input-dir',
         type=str,
         default='data/raw',
-        help='Directory containing downloaded ZIP/CSV files (default: data/raw)'
+        help='Directory containing downloaded ZIP/CSV/parquet files (default: data/raw)'
     )
 
     parser.add_argument(
@@ -415,6 +947,14 @@ Output Format:
         help='Skip saving data dictionary CSV'
     )
 
+    parser.add_argument(
+        '--compression',
+        type=str,
+        choices=['zstd', 'snappy', 'none'],
+        default='zstd',
+        help='Parquet compression codec (default: zstd)'
+    )
+
     args = parser.parse_args()
 
     # Setup paths
@@ -427,13 +967,14 @@ Output Format:
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Find files to process
-    files_to_process = (
-        list(input_dir.glob('*.zip')) +
-        list(input_dir.glob('*.ZIP')) +
-        list(input_dir.glob('*.csv')) +
-        list(input_dir.glob('*.CSV'))
-    )
+    # Find files to process in one directory pass, keeping sizes for scheduling
+    file_sizes = {}
+    with os.scandir(input_dir) as it:
+        for entry in it:
+            if entry.name.lower().endswith(INPUT_EXTENSIONS) and entry.is_file():
+                file_sizes[Path(entry.path)] = entry.stat().st_size
+
+    files_to_process = list(file_sizes)
 
     # Filter by year if specified
     if args.start_year or args.end_year:
@@ -449,7 +990,8 @@ Output Format:
             filtered_files.append(f)
         files_to_process = filtered_files
 
-    files_to_process.sort()
+    # Process in year order (files without a year sort first and fail fast)
+    files_to_process.sort(key=lambda f: (extract_year_from_filename(f.name) or 0, f.name))
 
     if not files_to_process:
         print("No files found to process")
@@ -461,7 +1003,10 @@ Output Format:
     elif args.workers:
         workers = args.workers
     else:
-        workers = multiprocessing.cpu_count()
+        workers = available_cpus()
+
+    # No point in more processes than files
+    workers = min(workers, len(files_to_process))
 
     # Fetch field descriptions
     if args.no_descriptions:
@@ -470,6 +1015,9 @@ Output Format:
         use_cache = not args.refresh_schema
         descriptions = fetch_field_descriptions(use_cache=use_cache)
 
+    # Field types for reading raw files (cached separately from descriptions)
+    schema_types = fetch_column_types()
+
     # Save data dictionary by default
     dict_path = Path("data/sod_dictionary.csv")
     if descriptions and not args.no_dictionary:
@@ -490,6 +1038,7 @@ Output Format:
     print(f"Output directory: {output_dir}")
     print(f"Files to process: {len(files_to_process)}")
     print(f"Parallel workers: {workers}")
+    print(f"Compression: {args.compression}")
     print(f"Field descriptions: {'Yes' if descriptions else 'No'}")
     print("="*80)
 
@@ -501,8 +1050,9 @@ Output Format:
     if workers == 1:
         # Sequential processing
         print("\nProcessing sequentially...")
+        init_worker(descriptions, schema_types)
         for file_path in files_to_process:
-            status, year, message = process_file_wrapper((str(file_path), str(output_dir), descriptions, args.force))
+            status, year, message = process_file_wrapper((str(file_path), str(output_dir), args.force, args.compression))
 
             if status == 'success':
                 successful.append(year)
@@ -518,39 +1068,58 @@ Output Format:
         # Parallel processing
         print(f"\nProcessing in parallel with {workers} workers...")
 
-        with ProcessPoolExecutor(max_workers=workers) as executor:
-            # Submit all tasks
-            future_to_file = {
-                executor.submit(process_file_wrapper, (str(f), str(output_dir), descriptions, args.force)): f
-                for f in files_to_process
-            }
-
-            # Process results as they complete
+        # Give each worker process an equal share of the cores for Arrow's
+        # threaded CSV parsing and conversion, so fewer files than CPUs
+        # still keeps every core busy without oversubscribing
+        arrow_threads = max(1, available_cpus() // workers)
+
+        # Largest files first so the biggest years don't start last. The
+        # largest files go out one per task so no worker gets two of them
+        # back to back; the small tail goes out in chunks so small years
+        # don't each pay a round trip
+        ordered_files = sorted(files_to_process, key=file_sizes.get, reverse=True)
+        n_single = workers * 4
+        tail_chunksize = max(1, (len(ordered_files) - n_single) // (workers * 4))
+        tasks = [(str(f), str(output_dir), args.force, args.compression) for f in ordered_files]
+
+        # Result lines are buffered and written out at progress checkpoints
+        # (errors immediately) instead of one stdout write per file
+        results_log, results_buffer = buffered_results_logger()
+
+        # Descriptions and column types are sent once per worker, not per task
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(descriptions, schema_types, arrow_threads)) as executor:
+            results = itertools.chain(
+                executor.map(process_file_wrapper, tasks[:n_single]),
+                executor.map(process_file_wrapper, tasks[n_single:], chunksize=tail_chunksize),
+            )
+
+            # Process results in submission order
             completed = 0
-            for future in as_completed(future_to_file):
-                file_path = future_to_file[future]
+            for file_path in ordered_files:
                 completed += 1
 
                 try:
-                    status, year, message = future.result()
+                    status, year, message = next(results)
 
                     if status == 'success':
                         successful.append(year)
-                        print(f"[{year}] {message}")
+                        results_log.info(f"[{year}] {message}")
                     elif status == 'skipped':
                         skipped.append(year)
-                        print(f"[{year}] {message}")
+                        results_log.info(f"[{year}] {message}")
                     else:
                         failed.append(year if year else file_path.name)
-                        print(f"[ERROR] {message}")
+                        results_log.error(f"[ERROR] {message}")
 
                 except Exception as e:
-                    print(f"[ERROR] Unexpected error processing {file_path.name}: {e}")
+                    results_log.error(f"[ERROR] Unexpected error processing {file_path.name}: {e}")
                     failed.append(file_path.name)
 
-                # Progress update
+                # Progress update (writes out the buffered result lines)
                 if completed % 5 == 0 or completed == len(files_to_process):
-                    print(f"  Progress: {completed}/{len(files_to_process)} files processed")
+                    results_log.info(f"  Progress: {completed}/{len(files_to_process)} files processed")
+                    results_buffer.flush()
 
     # Summary
     print("\n" + "="*80)
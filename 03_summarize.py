@@ -20,56 +20,214 @@ Usage:
 """
 
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import argparse
 import sys
+import os
+import json
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
-import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 
+# Per-file summaries from earlier runs, kept in the input directory
+SUMMARY_CACHE_FILE = '.summary_cache.json'
 
-def analyze_file(file_path_str):
+# Files analyzed between writes of sequential progress lines
+PROGRESS_FLUSH_EVERY = 100
+
+
+def reporting_period_from_stats(metadata):
+    """
+    Read the REPORTING_PERIOD value from the first row group's statistics.
+
+    Args:
+        metadata: pyarrow FileMetaData of a parquet file
+
+    Returns:
+        Timestamp, or None if the statistics are missing or span more
+        than one value
+    """
+    if metadata.num_row_groups == 0:
+        return None
+
+    row_group = metadata.row_group(0)
+    for i in range(row_group.num_columns):
+        column = row_group.column(i)
+        if column.path_in_schema != 'REPORTING_PERIOD':
+            continue
+
+        stats = column.statistics
+        if stats is None or not stats.has_min_max or stats.min != stats.max:
+            return None
+        return pd.Timestamp(stats.min)
+
+    return None
+
+
+def analyze_file(file_path_str, size_bytes):
     """
     Analyze a single parquet file.
 
     Args:
         file_path_str: Path to parquet file as string
+        size_bytes: File size in bytes (from the directory scan)
 
     Returns:
         Dictionary with file info or None if error
     """
-    file_path = Path(file_path_str)
+    file_name = os.path.basename(file_path_str)
 
     try:
-        # Read parquet file
-        df = pd.read_parquet(file_path)
-
         # Extract year from filename (e.g., "2020.parquet" -> 2020)
-        year = int(file_path.stem)
-
-        # Get reporting period
-        if 'REPORTING_PERIOD' in df.columns:
-            reporting_period = df['REPORTING_PERIOD'].iloc[0]
-        else:
-            # Fallback to June 30 of year
-            reporting_period = pd.Timestamp(year=year, month=6, day=30)
-
-        # Get file size
-        file_size_mb = file_path.stat().st_size / (1024 * 1024)
+        year = int(os.path.splitext(file_name)[0])
+
+        # Memory-map the file so the footer and column chunk are read
+        # straight from the page cache without buffered copies
+        with pa.memory_map(file_path_str, 'r') as source:
+            # Open parquet file (reads only the footer metadata)
+            pf = pq.ParquetFile(source)
+            schema = pf.schema_arrow
+            n_columns = len(schema)
+            num_rows = pf.metadata.num_rows
+
+            # Get reporting period from the footer statistics, or else from
+            # the first row group of that column only
+            if schema.get_field_index('REPORTING_PERIOD') != -1:
+                reporting_period = reporting_period_from_stats(pf.metadata)
+                if reporting_period is None:
+                    first_group = pf.read_row_group(0, columns=['REPORTING_PERIOD'])
+                    reporting_period = pd.Timestamp(first_group.column(0)[0].as_py())
+            else:
+                # Fallback to June 30 of year
+                reporting_period = pd.Timestamp(year=year, month=6, day=30)
+
+        file_size_mb = size_bytes / (1024 * 1024)
 
         return {
             'year': year,
             'date': reporting_period,
-            'branches': len(df),
-            'variables': len(df.columns) - 2,  # Exclude CERT and REPORTING_PERIOD
-            'total_columns': len(df.columns),
+            'branches': num_rows,
+            'variables': n_columns - 2,  # Exclude CERT and REPORTING_PERIOD
             'size_mb': file_size_mb,
-            'file': file_path.name
+            'file': file_name
         }
 
     except Exception as e:
-        print(f"Error processing {file_path.name}: {e}")
+        print(f"Error processing {file_name}: {e}")
+        return None
+
+
+def load_summary_cache(input_dir):
+    """Load cached per-file summaries, or an empty dict if unavailable."""
+    try:
+        with open(input_dir / SUMMARY_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_summary_cache(input_dir, cache):
+    """Write the summary cache atomically (temporary file, then rename)."""
+    cache_path = input_dir / SUMMARY_CACHE_FILE
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not save summary cache: {e}")
+
+
+def cached_summary(entry, size_bytes, mtime_ns):
+    """
+    Get a file's cached summary if the file is unchanged since it was cached.
+
+    Args:
+        entry: Cache entry for the file, or None
+        size_bytes: Current file size in bytes
+        mtime_ns: Current modification time in nanoseconds
+
+    Returns:
+        Dictionary with file info as from analyze_file, or None if stale
+    """
+    if not entry or entry.get('size') != size_bytes or entry.get('mtime_ns') != mtime_ns:
         return None
 
+    result = dict(entry['summary'])
+    result['date'] = pd.Timestamp(result['date'])
+    result['size_mb'] = size_bytes / (1024 * 1024)
+    return result
+
+
+def scan_parquet_files(input_dir):
+    """
+    List parquet files in a directory with their sizes and modification times.
+
+    Args:
+        input_dir: Directory to scan (Path)
+
+    Returns:
+        List of (path_str, size_bytes, mtime_ns) tuples sorted by path
+    """
+    # Where supported, scan an open directory fd so each entry's stat is an
+    # fstatat relative to it rather than a lookup of the full path
+    dir_fd = None
+    if os.scandir in os.supports_fd:
+        dir_fd = os.open(input_dir, os.O_RDONLY)
+
+    try:
+        with os.scandir(input_dir if dir_fd is None else dir_fd) as it:
+            files = []
+            for entry in it:
+                if entry.name.endswith('.parquet') and entry.is_file():
+                    st = entry.stat()
+                    files.append((str(input_dir / entry.name), st.st_size, st.st_mtime_ns))
+            return sorted(files)
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+
+def write_summary_csv(table, output_csv):
+    """
+    Write the summary table to CSV with Arrow's C++ CSV writer.
+
+    Output follows DataFrame.to_csv: an unquoted header, dates without a
+    time of day when every date is at midnight, and values quoted only
+    when they contain a delimiter or quote.
+
+    Args:
+        table: Summary Arrow Table
+        output_csv: Path of the CSV file to write
+    """
+    # Total column count is always the variables plus CERT and REPORTING_PERIOD
+    variables_idx = table.schema.get_field_index('variables')
+    table = table.add_column(variables_idx + 1, 'total_columns',
+                             pc.add(table.column(variables_idx), 2))
+
+    date_idx = table.schema.get_field_index('date')
+    dates = table.column(date_idx)
+    days = dates.cast(pa.date32())
+    if pc.all(pc.equal(days.cast(dates.type), dates)).as_py():
+        table = table.set_column(date_idx, 'date', days)
+
+    # Render in memory first; quote strings only if some value requires it
+    try:
+        body = pa.BufferOutputStream()
+        pacsv.write_csv(table, body, pacsv.WriteOptions(include_header=False,
+                                                        quoting_style='none'))
+    except pa.ArrowInvalid:
+        body = pa.BufferOutputStream()
+        pacsv.write_csv(table, body, pacsv.WriteOptions(include_header=False))
+
+    with open(output_csv, 'wb') as f:
+        f.write((','.join(table.column_names) + '\n').encode('utf-8'))
+        f.write(body.getvalue())
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -99,7 +257,7 @@ Examples:
         '--workers',
         type=int,
         default=None,
-        help='Number of parallel workers (default: all CPUs)'
+        help='Number of worker threads (default: one per file, up to 32)'
     )
 
     parser.add_argument(
@@ -114,6 +272,12 @@ Examples:
         help='Save summary to CSV file'
     )
 
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f'Re-read every file instead of reusing {SUMMARY_CACHE_FILE}'
+    )
+
     args = parser.parse_args()
 
     # Setup
@@ -123,8 +287,8 @@ Examples:
         print(f"ERROR: Directory does not exist: {input_dir}")
         sys.exit(1)
 
-    # Find parquet files
-    parquet_files = sorted(input_dir.glob('*.parquet'))
+    # Find parquet files and their sizes in one directory pass
+    parquet_files = scan_parquet_files(input_dir)
 
     if not parquet_files:
         print(f"No parquet files found in {input_dir}")
@@ -136,89 +300,151 @@ Examples:
     elif args.workers:
         workers = args.workers
     else:
-        workers = multiprocessing.cpu_count()
+        # Metadata reads are I/O bound and release the GIL, so threads can
+        # outnumber CPUs; a few dozen saturate a local disk
+        workers = 32
+
+    # Analyze files into preallocated summary columns, one slot per file
+    n_files = len(parquet_files)
+    summary = {
+        'year': np.empty(n_files, dtype=np.int32),
+        'date': np.empty(n_files, dtype='datetime64[ns]'),
+        'branches': np.empty(n_files, dtype=np.int64),
+        'variables': np.empty(n_files, dtype=np.int32),
+        'size_mb': np.empty(n_files, dtype=np.float64),
+        'file': np.empty(n_files, dtype=object),
+    }
+    analyzed = np.zeros(n_files, dtype=bool)
+
+    # Summaries to cache for the next run, keyed by file name
+    cache = {} if args.no_cache else load_summary_cache(input_dir)
+    new_cache = {}
+
+    def record(index, result):
+        for key, column in summary.items():
+            column[index] = result[key]
+        analyzed[index] = True
+
+        _, size_bytes, mtime_ns = parquet_files[index]
+        cached = {key: result[key] for key in summary if key != 'size_mb'}
+        cached['date'] = result['date'].isoformat()
+        new_cache[result['file']] = {'size': size_bytes, 'mtime_ns': mtime_ns, 'summary': cached}
+
+    # Reuse cached summaries of files whose size and mtime are unchanged
+    pending = []
+    for index, (file_path, size_bytes, mtime_ns) in enumerate(parquet_files):
+        result = cached_summary(cache.get(os.path.basename(file_path)), size_bytes, mtime_ns)
+        if result:
+            record(index, result)
+        else:
+            pending.append(index)
+
+    # No point in more threads than files to read
+    workers = min(workers, max(len(pending), 1))
 
     print("="*80)
     print("SUMMARY OF DEPOSITS DATA SUMMARY")
     print("="*80)
     print(f"Directory: {input_dir}")
     print(f"Files found: {len(parquet_files)}")
+    print(f"Unchanged (cached): {len(parquet_files) - len(pending)}")
     print(f"Parallel workers: {workers}")
     print("="*80)
 
-    # Analyze files
-    results = []
+    if not pending:
+        print("\nAll files unchanged since the last run")
 
-    if workers == 1:
+    elif workers == 1:
         # Sequential processing
         print("\nAnalyzing files sequentially...")
-        for file_path in parquet_files:
-            result = analyze_file(str(file_path))
+        progress = []
+        for completed, index in enumerate(pending, start=1):
+            file_path, size_bytes, _ = parquet_files[index]
+            result = analyze_file(file_path, size_bytes)
             if result:
-                results.append(result)
-                print(f"  Processed {result['year']}")
+                record(index, result)
+                progress.append(f"  Processed {result['year']}\n")
+
+            # Write progress lines in bulk rather than one print per file
+            if completed % PROGRESS_FLUSH_EVERY == 0 or completed == len(pending):
+                sys.stdout.write(''.join(progress))
+                progress.clear()
 
     else:
         # Parallel processing
         print(f"\nProcessing files in parallel with {workers} workers...")
 
-        with ProcessPoolExecutor(max_workers=workers) as executor:
-            future_to_file = {
-                executor.submit(analyze_file, str(f)): f
-                for f in parquet_files
-            }
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                analyze_file,
+                [parquet_files[index][0] for index in pending],
+                [parquet_files[index][1] for index in pending],
+            )
 
+            # Results arrive in file order, so no index lookup is needed
             completed = 0
-            for future in as_completed(future_to_file):
+            for index in pending:
                 completed += 1
 
                 try:
-                    result = future.result()
+                    result = next(results)
                     if result:
-                        results.append(result)
+                        record(index, result)
 
                     # Progress update
-                    if completed % 10 == 0 or completed == len(parquet_files):
-                        print(f"  Processed {completed}/{len(parquet_files)} files...")
+                    if completed % 10 == 0 or completed == len(pending):
+                        print(f"  Processed {completed}/{len(pending)} files...")
 
                 except Exception as e:
                     print(f"  Error: {e}")
 
-    if not results:
+    if not args.no_cache and new_cache != cache:
+        save_summary_cache(input_dir, new_cache)
+
+    if not analyzed.any():
         print("\nNo valid data found")
         return 1
 
-    # Create summary DataFrame
-    df_summary = pd.DataFrame(results)
-    df_summary = df_summary.sort_values('year')
+    # Create summary table (dropping files that failed); rows are already
+    # in year order since files are named {YEAR}.parquet and sorted
+    if not analyzed.all():
+        summary = {key: column[analyzed] for key, column in summary.items()}
+    summary_table = pa.table(summary)
+
+    # Print summary table (dates formatted for the whole column at once)
+    columns = summary_table.select(['year', 'branches', 'variables', 'size_mb']).to_pydict()
+    dates = pc.strftime(summary_table['date'], format='%Y-%m-%d').to_pylist()
 
-    # Print summary table
     print()
     print(f"{'Year':<6} {'Date':<12} {'Branches':>9} {'Variables':>10} {'Size (MB)':>10}")
     print("-" * 6 + " " + "-" * 12 + " " + "-" * 9 + " " + "-" * 10 + " " + "-" * 10)
 
-    for _, row in df_summary.iterrows():
-        print(f"{row['year']:<6} {row['date'].strftime('%Y-%m-%d'):<12} "
-              f"{row['branches']:>9,} {row['variables']:>10,} {row['size_mb']:>10.1f}")
+    for year, date, n_branches, n_variables, size_mb in zip(
+            columns['year'], dates, columns['branches'], columns['variables'], columns['size_mb']):
+        print(f"{year:<6} {date:<12} {n_branches:>9,} {n_variables:>10,} {size_mb:>10.1f}")
+
+    # Overall statistics with Arrow compute kernels
+    date_range = pc.min_max(summary_table['date'])
+    branches = pc.min_max(summary_table['branches'])
+    variables = pc.min_max(summary_table['variables'])
 
-    # Overall statistics
     print("\n" + "="*80)
     print("OVERALL STATISTICS")
     print("="*80)
-    print(f"Total years: {len(df_summary)}")
-    print(f"Date range: {df_summary['date'].min().strftime('%Y-%m-%d')} to {df_summary['date'].max().strftime('%Y-%m-%d')}")
-    print(f"Branches (avg): {df_summary['branches'].mean():,.0f}")
-    print(f"Branches (min): {df_summary['branches'].min():,}")
-    print(f"Branches (max): {df_summary['branches'].max():,}")
-    print(f"Variables (avg): {df_summary['variables'].mean():.0f}")
-    print(f"Variables (min): {df_summary['variables'].min()}")
-    print(f"Variables (max): {df_summary['variables'].max()}")
-    print(f"Total size: {df_summary['size_mb'].sum():.1f} MB")
+    print(f"Total years: {summary_table.num_rows}")
+    print(f"Date range: {date_range['min'].as_py().strftime('%Y-%m-%d')} to {date_range['max'].as_py().strftime('%Y-%m-%d')}")
+    print(f"Branches (avg): {pc.mean(summary_table['branches']).as_py():,.0f}")
+    print(f"Branches (min): {branches['min'].as_py():,}")
+    print(f"Branches (max): {branches['max'].as_py():,}")
+    print(f"Variables (avg): {pc.mean(summary_table['variables']).as_py():.0f}")
+    print(f"Variables (min): {variables['min'].as_py()}")
+    print(f"Variables (max): {variables['max'].as_py()}")
+    print(f"Total size: {pc.sum(summary_table['size_mb']).as_py():.1f} MB")
     print("="*80)
 
     # Save to CSV if requested
     if args.output_csv:
-        df_summary.to_csv(args.output_csv, index=False)
+        write_summary_csv(summary_table, args.output_csv)
         print(f"\nSummary saved to: {args.output_csv}")
 
     return 0
@@ -2,7 +2,7 @@
 Clean up downloaded and processed SOD data files.
 
 Usage:
-    # Delete raw files (ZIP/CSV)
+    # Delete raw files (ZIP/CSV/parquet)
     python cleanup.py --raw
 
     # Delete processed files (parquet)
@@ -16,39 +16,114 @@ Usage:
 """
 
 import argparse
+import functools
+import os
+import re
+import shutil
+import stat
 import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
+# File name patterns for each data directory
+RAW_FILE_PATTERN = re.compile(r'\.(zip|csv|parquet)$', re.IGNORECASE)
+PROCESSED_FILE_PATTERN = re.compile(r'\.parquet$')
 
-def get_files(directory, patterns):
-    """Get all files matching patterns in directory."""
+# Bookkeeping written next to the data by 01_download.py and 03_summarize.py;
+# it describes the data files, so --all removes it along with them
+STATE_FILES = ('.download_state.json', '.summary_cache.json')
+
+
+def get_files(directory, pattern):
+    """Get (path, size) for all files in directory whose name matches pattern."""
     files = []
-    dir_path = Path(directory)
 
-    if not dir_path.exists():
+    if not os.path.isdir(directory):
         return files
 
-    for pattern in patterns:
-        files.extend(dir_path.glob(pattern))
+    # One directory pass; each entry is stat-ed exactly once and the size
+    # is carried through to delete_files
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not pattern.search(entry.name):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                continue
+            size = entry.stat(follow_symlinks=False).st_size
+            files.append((entry.path, size))
 
     return sorted(files)
 
 
-def delete_files(files, dry_run=False):
-    """Delete files and return count."""
+def delete_files(directory, files, dry_run=False, threads=8, whole_directory=False):
+    """Delete files from directory and return count.
+
+    With whole_directory, the pipeline's state files are deleted too, and a
+    directory holding nothing but these files and state files is removed
+    with one rmtree and recreated empty instead of unlinked per file.
+    """
     deleted = 0
     total_size = 0
 
-    for f in files:
-        size = f.stat().st_size
-        total_size += size
-
-        if dry_run:
-            print(f"  [DRY RUN] Would delete: {f.name} ({size / 1024 / 1024:.1f} MB)")
-        else:
-            f.unlink()
-            print(f"  Deleted: {f.name} ({size / 1024 / 1024:.1f} MB)")
-        deleted += 1
+    if dry_run:
+        for path, size in files:
+            total_size += size
+            print(f"  [DRY RUN] Would delete: {os.path.basename(path)} ({size / 1024 / 1024:.1f} MB)")
+            deleted += 1
+
+        return deleted, total_size
+
+    # A symlinked data directory can't be rmtree'd, so it takes the per-file path
+    file_names = {os.path.basename(path) for path, _ in files}
+    if (whole_directory and not os.path.islink(directory)
+            and set(os.listdir(directory)) <= file_names.union(STATE_FILES)):
+        st = os.stat(directory)
+        shutil.rmtree(directory)
+        os.makedirs(directory)
+
+        # Recreate with the original permission bits (incl. setgid) and owner
+        os.chmod(directory, stat.S_IMODE(st.st_mode))
+        try:
+            os.chown(directory, st.st_uid, st.st_gid)
+        except OSError:
+            pass
+
+        for path, size in files:
+            total_size += size
+            print(f"  Deleted: {os.path.basename(path)} ({size / 1024 / 1024:.1f} MB)")
+            deleted += 1
+
+        return deleted, total_size
+
+    # Where supported, open the directory once and unlink entries relative
+    # to it (unlinkat) so each call skips resolving the full path again
+    dir_fd = None
+    if os.unlink in os.supports_dir_fd:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        unlink = functools.partial(os.unlink, dir_fd=dir_fd)
+        targets = [os.path.basename(path) for path, _ in files]
+    else:
+        unlink = os.unlink
+        targets = [path for path, _ in files]
+
+    # Unlinks are metadata round-trips, so overlap them across threads.
+    # Workers only call os.unlink; results come back in submission order
+    # and are printed here.
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for (path, size), _ in zip(files, executor.map(unlink, targets)):
+                total_size += size
+                print(f"  Deleted: {os.path.basename(path)} ({size / 1024 / 1024:.1f} MB)")
+                deleted += 1
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+    if whole_directory:
+        for name in STATE_FILES:
+            try:
+                os.unlink(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
 
     return deleted, total_size
 
@@ -59,7 +134,7 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
-  # Delete raw files (ZIP/CSV)
+  # Delete raw files (ZIP/CSV/parquet)
   python cleanup.py --raw
 
   # Delete processed files (parquet)
@@ -76,7 +151,7 @@ Examples:
     parser.add_argument(
         '--raw',
         action='store_true',
-        help='Delete raw files (ZIP/CSV) in data/raw'
+        help='Delete raw files (ZIP/CSV/parquet) in data/raw'
     )
 
     parser.add_argument(
@@ -88,7 +163,7 @@ Examples:
     parser.add_argument(
         '--all',
         action='store_true',
-        help='Delete all data files (raw + processed)'
+        help='Delete all data files (raw + processed) and their state files'
     )
 
     parser.add_argument(
@@ -111,8 +186,18 @@ Examples:
         help='Show what would be deleted without actually deleting'
     )
 
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=8,
+        help='Number of threads used to delete files (default: 8)'
+    )
+
     args = parser.parse_args()
 
+    if args.threads < 1:
+        parser.error('--threads must be at least 1')
+
     # Handle --all flag
     if args.all:
         args.raw = True
@@ -139,11 +224,11 @@ Examples:
     # Clean raw files
     if args.raw:
         print(f"Raw directory: {args.raw_dir}")
-        raw_patterns = ['*.zip', '*.ZIP', '*.csv', '*.CSV']
-        raw_files = get_files(args.raw_dir, raw_patterns)
+        raw_files = get_files(args.raw_dir, RAW_FILE_PATTERN)
 
         if raw_files:
-            deleted, size = delete_files(raw_files, args.dry_run)
+            deleted, size = delete_files(args.raw_dir, raw_files, args.dry_run, args.threads,
+                                         whole_directory=args.all)
             total_deleted += deleted
             total_size += size
             print(f"  Total: {deleted} files ({size / 1024 / 1024:.1f} MB)")
@@ -154,11 +239,11 @@ Examples:
     # Clean processed files
     if args.processed:
         print(f"Processed directory: {args.processed_dir}")
-        processed_patterns = ['*.parquet']
-        processed_files = get_files(args.processed_dir, processed_patterns)
+        processed_files = get_files(args.processed_dir, PROCESSED_FILE_PATTERN)
 
         if processed_files:
-            deleted, size = delete_files(processed_files, args.dry_run)
+            deleted, size = delete_files(args.processed_dir, processed_files, args.dry_run,
+                                         args.threads, whole_directory=args.all)
             total_deleted += deleted
             total_size += size
             print(f"  Total: {deleted} files ({size / 1024 / 1024:.1f} MB)")